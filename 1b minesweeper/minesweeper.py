@@ -1,6 +1,12 @@
 import itertools
 import random
 
+import numpy as np
+
+# Below this many sentence pairs, building the numpy arrays and calling
+# the kernel costs more than the pure Python subset loop
+KERNEL_MIN_PAIRS = 150
+
 
 class Minesweeper():
     """
@@ -12,23 +18,17 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        # Initialize an empty field with no mines, padded with a
+        # 1-cell border of zeros so neighbourhoods never go out of bounds
+        self._padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        self.board = self._padded[1:-1, 1:-1]
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, sampling distinct cell indices in one shot
+        flat = random.sample(range(height * width), mines)
+        rows, cols = np.unravel_index(np.array(flat, dtype=np.intp), (height, width))
+        self.board[rows, cols] = 1
+        self.mines = set(zip(rows.tolist(), cols.tolist()))
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -41,7 +41,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i, j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -54,7 +54,7 @@ class Minesweeper():
         except Exception as ex:
             print(cell)
             raise ex
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -62,24 +62,12 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        # Sum the 3x3 window around the cell in the padded board
+        # (cell (i, j) sits at (i + 1, j + 1)), minus the cell itself
+        padded = self._padded
+        return int(padded[i:i + 3, j:j + 3].sum()) - int(padded[i + 1, j + 1])
 
     def won(self):
         """
@@ -88,51 +76,197 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+def popcount(mask):
+    """
+    Returns the number of cells set in a cell bitmask.
+    """
+    return bin(mask).count("1")
+
+
+def iter_cells(mask):
+    """
+    Yields the ids of all cells set in a cell bitmask.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# Subset kernel, on uint64 masks. numba is optional, and slow to import:
+# these are plain Python functions until load_kernel() compiles them, the
+# first time a subset step has enough pairs to use the kernel
+def _subset_pair(l, lc, r, rc, out_masks, out_counts, k):
+    common = l & r
+    if common == l:
+        if l != r:
+            out_masks[k] = r & ~l
+            out_counts[k] = rc - lc
+            k += 1
+    elif common == r:
+        out_masks[k] = l & ~r
+        out_counts[k] = lc - rc
+        k += 1
+    return k
+
+
+def infer_subsets(delta_masks, delta_counts, masks, counts):
+    """
+    Applies the subset method, in both directions, to every pair of
+    delta sentences and every pair of a delta sentence and another
+    known sentence. Sentences are given as arrays of uint64 cell
+    masks and their counts.
+    Returns the arrays of inferred masks and counts.
+    """
+    n = delta_masks.shape[0]
+    m = masks.shape[0]
+    size = n * (n - 1) // 2 + n * m
+    out_masks = np.empty(size, np.uint64)
+    out_counts = np.empty(size, np.int64)
+    k = 0
+    for i in range(n):
+        l = delta_masks[i]
+        lc = delta_counts[i]
+        for j in range(i + 1, n):
+            k = _subset_pair(
+                l, lc, delta_masks[j], delta_counts[j], out_masks, out_counts, k)
+        for j in range(m):
+            k = _subset_pair(
+                l, lc, masks[j], counts[j], out_masks, out_counts, k)
+    return out_masks[:k], out_counts[:k]
+
+
+# Compiled infer_subsets, once load_kernel() has run
+_kernel = None
+_kernel_loaded = False
+
+
+def load_kernel():
+    """
+    Returns `infer_subsets` compiled with numba, importing numba and
+    compiling it on the first call, or None if numba is not installed.
+    """
+    global _kernel, _kernel_loaded, _subset_pair
+    if not _kernel_loaded:
+        _kernel_loaded = True
+        try:
+            from numba import njit
+        except ImportError:
+            return None
+        # infer_subsets looks _subset_pair up as a global when compiled
+        _subset_pair = njit(cache=True)(_subset_pair)
+        _kernel = njit(cache=True)(infer_subsets)
+    return _kernel
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
-    A sentence consists of a set of board cells,
+    A sentence consists of a set of board cells (as integer cell ids),
     and a count of the number of those cells which are mines.
+
+    The cells are stored as a bitmask, with bit `id` set
+    iff the cell with that id is in the sentence.
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells_mask = 0
+        for cell in cells:
+            self.cells_mask |= 1 << cell
         self.count = count
 
+        # Number of cells, kept up to date by mark_mine / mark_safe
+        self.size = popcount(self.cells_mask)
+
+        # Set whenever cells change, so unchanged sentences can be
+        # skipped when looking for known mines and safes
+        self._dirty = True
+        self._known_mines = 0
+        self._known_safes = 0
+
+    @classmethod
+    def from_mask(cls, cells_mask, count):
+        sentence = cls((), count)
+        sentence.cells_mask = cells_mask
+        sentence.size = popcount(cells_mask)
+        return sentence
+
+    @property
+    def cells(self):
+        # Immutable, since it is a decoded copy of cells_mask:
+        # changes must go through mark_mine / mark_safe
+        return frozenset(iter_cells(self.cells_mask))
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return self.cells_mask == other.cells_mask and self.count == other.count
+
+    def __hash__(self):
+        # Changes when the sentence is marked, see MinesweeperAI._reindex
+        return hash((self.cells_mask, self.count))
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
 
     def known_mines(self):
         """
-        Returns the set of all cells in self.cells known to be mines.
+        Returns the mask of all cells in self.cells known to be mines.
         """
-        return self.cells if self.count == len(self.cells) else set()
+        if self._dirty:
+            self._known_mines = self.cells_mask if self.count == self.size else 0
+        return self._known_mines
 
     def known_safes(self):
         """
-        Returns the set of all cells in self.cells known to be safe.
+        Returns the mask of all cells in self.cells known to be safe.
         """
-        return self.cells if self.count == 0 else set()
+        if self._dirty:
+            self._known_safes = self.cells_mask if self.count == 0 else 0
+        return self._known_safes
 
     def mark_mine(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        bit = 1 << cell
+        if self.cells_mask & bit:
+            self.cells_mask ^= bit
+            self.size -= 1
             self.count -= 1
+            self._dirty = True
 
     def mark_safe(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        bit = 1 << cell
+        if self.cells_mask & bit:
+            self.cells_mask ^= bit
+            self.size -= 1
+            self._dirty = True
+
+    def mark_mines_batch(self, cells_mask):
+        """
+        Marks all cells of a mask as mines at once.
+        """
+        hit = self.cells_mask & cells_mask
+        if hit:
+            removed = popcount(hit)
+            self.cells_mask ^= hit
+            self.size -= removed
+            self.count -= removed
+            self._dirty = True
+
+    def mark_safes_batch(self, cells_mask):
+        """
+        Marks all cells of a mask as safe at once.
+        """
+        hit = self.cells_mask & cells_mask
+        if hit:
+            self.cells_mask ^= hit
+            self.size -= popcount(hit)
+            self._dirty = True
 
 
 class MinesweeperAI():
@@ -140,43 +274,209 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
+    # Neighbour masks of every cell id, shared by all AIs of the
+    # same board size, keyed by (height, width)
+    _NEIGHBOR_CACHE = {}
+
     def __init__(self, height=8, width=8):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Ids of cells that have not been chosen and are not known to be mines,
+        # as a list for O(1) random choice plus each id's position in it
+        self._available_list = list(range(height * width))
+        self._available_index = {c: c for c in self._available_list}
+
+        # Mask of the (up to 8) neighbours of each cell, by cell id
+        self._neighbors = self._neighbor_masks(height, width)
+
         # Keep track of which cells have been clicked on
-        self.moves_made = set()
+        self._moves_made = 0
 
         # Keep track of cells known to be safe or mines
-        self.mines = set()
-        self.safes = set()
+        self._mines = 0
+        self._safes = 0
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, as an insertion
+        # ordered dict (values are unused) so duplicates are found in O(1)
+        self.knowledge = {}
+
+        # Sentences shrunk by mark_mine / mark_safe since the last
+        # add_knowledge, to be paired again by its inference loop
+        self._pending = []
+
+        # The compiled subset kernel works on uint64 masks
+        self._use_kernel = height * width <= 64
+
+    @classmethod
+    def _neighbor_masks(cls, height, width):
+        """
+        Returns the neighbour mask of every cell id for a board size,
+        computing it only the first time the size is seen.
+        """
+        key = (height, width)
+        if key not in cls._NEIGHBOR_CACHE:
+            masks = []
+            for i in range(height):
+                for j in range(width):
+                    mask = 0
+                    for di in (-1, 0, 1):
+                        for dj in (-1, 0, 1):
+                            ni, nj = i + di, j + dj
+                            if (di or dj) and 0 <= ni < height and 0 <= nj < width:
+                                mask |= 1 << (ni * width + nj)
+                    masks.append(mask)
+            cls._NEIGHBOR_CACHE[key] = tuple(masks)
+        return cls._NEIGHBOR_CACHE[key]
+
+    # Cells are stored internally as bits of an int mask, at id
+    # (i * width + j), and converted back to (i, j) tuples at the
+    # API boundary.
+    def _enc(self, cell):
+        return cell[0] * self.width + cell[1]
+
+    def _dec(self, cell_id):
+        return divmod(cell_id, self.width)
+
+    def _dec_mask(self, mask):
+        return {self._dec(c) for c in iter_cells(mask)}
+
+    @property
+    def moves_made(self):
+        return self._dec_mask(self._moves_made)
+
+    @property
+    def mines(self):
+        return self._dec_mask(self._mines)
+
+    @property
+    def safes(self):
+        return self._dec_mask(self._safes)
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        print("*** *** mark mine:", cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self._mark_mine(self._enc(cell))
+        self._reindex()
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
+        self._mark_safe(self._enc(cell))
+        self._reindex()
+
+    def _discard_available(self, cell_id):
+        """
+        Removes a cell from the available cells in O(1), by moving
+        the last cell of the list into its position.
+        """
+        idx = self._available_index.pop(cell_id, None)
+        if idx is None:
+            return
+        last = self._available_list.pop()
+        if last != cell_id:
+            self._available_list[idx] = last
+            self._available_index[last] = idx
+
+    def _mark_mine(self, cell_id):
+        self._mines |= 1 << cell_id
+        self._discard_available(cell_id)
+        print("*** *** mark mine:", self._dec(cell_id))
+        bit = 1 << cell_id
+        for sentence in self.knowledge:
+            if sentence.cells_mask & bit:
+                sentence.mark_mine(cell_id)
+                self._pending.append(sentence)
+
+    def _mark_safe(self, cell_id):
+        bit = 1 << cell_id
+        self._safes |= bit
         for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+            if sentence.cells_mask & bit:
+                sentence.mark_safe(cell_id)
+                self._pending.append(sentence)
 
-    def compute_knowledge_coords(self):
-        return set(itertools.chain.from_iterable(sentence.cells for sentence in self.knowledge))
+    def _add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, unless it is empty
+        or already known. Returns whether it was added.
+        """
+        if not sentence.cells_mask or sentence in self.knowledge:
+            return False
+        self.knowledge[sentence] = None
+        return True
+
+    def _reindex(self):
+        """
+        Rebuilds the knowledge base after marking cells, since that changes
+        the hash of the marked sentences. Also drops sentences left empty,
+        and merges sentences that became duplicates.
+        """
+        self.knowledge = {
+            sentence: None for sentence in self.knowledge if sentence.cells_mask}
+
+    def _others(self, delta):
+        """
+        Returns the sentences in the knowledge base that are not in delta,
+        and are worth pairing with it (see `add_knowledge`).
+        """
+        in_delta = {id(sentence) for sentence in delta}
+        return [
+            sentence for sentence in self.knowledge
+            if sentence.size > 1 and id(sentence) not in in_delta
+        ]
+
+    def _infer_subsets(self, delta, others):
+        """
+        Applies the subset method to every pair of delta sentences and
+        every pair of a delta sentence and one of `others`.
+        Returns the set of inferred (mask, count) tuples.
+        """
+        # stored as (mask, count) tuples instead of Sentence(), to eliminate duplicates
+        new_sentences = set()
+        add = new_sentences.add
+
+        # each pair is visited once, and only the smaller side can be a
+        # strict subset of the other (equal sizes can be ignored, because
+        # the result would be an empty set with 0 count)
+        pairs = itertools.chain(
+            itertools.combinations(delta, 2),
+            itertools.product(delta, others),
+        )
+        for left, right in pairs:
+            left_size = left.size
+            right_size = right.size
+            if left_size < right_size:
+                l = left.cells_mask
+                r = right.cells_mask
+                if (l & r) == l:
+                    add((r & ~l, right.count - left.count))
+            elif right_size < left_size:
+                l = left.cells_mask
+                r = right.cells_mask
+                if (l & r) == r:
+                    add((l & ~r, left.count - right.count))
+
+        return new_sentences
+
+    def _infer_subsets_kernel(self, delta, others):
+        """
+        Same as `_infer_subsets`, compiled with numba (only used if the
+        board fits in 64 cells and there are enough pairs to pay off).
+        """
+        out_masks, out_counts = load_kernel()(
+            np.array([sentence.cells_mask for sentence in delta], np.uint64),
+            np.array([sentence.count for sentence in delta], np.int64),
+            np.array([sentence.cells_mask for sentence in others], np.uint64),
+            np.array([sentence.count for sentence in others], np.int64),
+        )
+        return set(zip(out_masks.tolist(), out_counts.tolist()))
 
     def add_knowledge(self, cell, count):
         """
@@ -194,70 +494,97 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
 
+        cell_id = self._enc(cell)
+
         # 1 • The function should mark the cell as one of the moves made in the game.
-        self.moves_made.add(cell)
+        self._moves_made |= 1 << cell_id
+        self._discard_available(cell_id)
 
         # 2 • The function should mark the cell as a safe cell, updating any sentences that contain the cell as well.
-        self.mark_safe(cell)
+        # Sentences never hold known safes, so a cell that was already
+        # known to be safe (e.g. a safe move) needs no marking at all.
+        bit = 1 << cell_id
+        marked_safe = []
+        if not self._safes & bit:
+            self._safes |= bit
+            for sentence in self.knowledge:
+                if sentence.cells_mask & bit:
+                    sentence.mark_safe(cell_id)
+                    marked_safe.append(sentence)
+            self._reindex()
 
         # 3 • The function should add a new sentence to the AI’s knowledge base, based on the value of cell and count, to indicate that count of the cell’s neighbors are mines. Be sure to only include cells whose state is still undetermined in the sentence.
-        x, y = cell
-        adjacent_cells = {
-            (i, j)
-            for i in range(x-1, x+1+1)
-            for j in range(y-1, y+1+1)
-            if 0 <= i and i < self.height
-            and 0 <= j and j < self.width
-        }
-        adjacent_cells -= {cell}
-
-        # exclude known mines
-        valid_adjacent_cells = adjacent_cells - self.mines
-        # deduct (number of known mines excluded) from count!
-        new_count = count - (len(adjacent_cells) - len(valid_adjacent_cells))
+        adjacent_cells = self._neighbors[cell_id]
+        adjacent_mines = adjacent_cells & self._mines
 
-        # exclude known safes
-        valid_adjacent_cells -= self.safes
+        # exclude known mines and known safes
+        valid_adjacent_cells = adjacent_cells & ~(self._mines | self._safes)
+        # deduct (number of known mines excluded) from count!
+        new_count = count - popcount(adjacent_mines)
 
-        if len(valid_adjacent_cells) > 0:
-            self.knowledge.append(
-                Sentence(valid_adjacent_cells, new_count))  # use new_count!
+        new_sentence = Sentence.from_mask(valid_adjacent_cells, new_count)  # use new_count!
+        is_new_sentence_added = self._add_sentence(new_sentence)
 
         # "Updating" involves checking each sentence for known mines / safes, and marking them on all sentences.
-        def update_knowledge(sentence_list):
-            unmarked_safes = set()
-            unmarked_mines = set()
-
-            # accumulate unmarked mines and safes
-            for sentence in sentence_list:
-                sentence_size = len(sentence.cells)
-                if sentence_size == 0:
-                    self.knowledge.remove(sentence)
-                    continue
-                known_safes = sentence.known_safes()
-                if len(known_safes) > 0:
-                    unmarked_safes |= known_safes
-                    self.knowledge.remove(sentence)
-                    continue
-                known_mines = sentence.known_mines()
-                if len(known_mines) > 0:
-                    unmarked_mines |= known_mines
-                    self.knowledge.remove(sentence)
+        # Returns the sentences that were changed by the marking.
+        def update_knowledge():
+            unmarked_safes = 0
+            unmarked_mines = 0
 
-            # return the fact that no changes are needed
-            if len(unmarked_mines) == 0 and len(unmarked_safes) == 0:
-                return False
+            knowledge = self.knowledge
 
-            # update knowledge
-            self.mines |= unmarked_mines
-            self.safes |= unmarked_safes
-            for mine in unmarked_mines:
-                self.mark_mine(mine)
-            for safe in unmarked_safes:
-                self.mark_safe(safe)
+            # accumulate unmarked mines and safes,
+            # only sentences changed since the last check can have any
+            for sentence in knowledge:
+                if not sentence._dirty:
+                    continue
+                unmarked_safes |= sentence.known_safes()
+                unmarked_mines |= sentence.known_mines()
+                sentence._dirty = False
+
+            # skip cells that are already known
+            unmarked_mines &= ~self._mines
+            unmarked_safes &= ~self._safes
 
-            # return the fact that changes have been made
-            return True
+            # return the fact that no changes are needed
+            if not unmarked_mines and not unmarked_safes:
+                return []
+
+            # drop sentences that are fully resolved (or already empty)
+            resolved = unmarked_mines | unmarked_safes
+            knowledge = self.knowledge = {
+                sentence: None for sentence in knowledge
+                if sentence.cells_mask & ~resolved
+            }
+            changed = [
+                sentence for sentence in knowledge
+                if sentence.cells_mask & resolved
+            ]
+
+            # update knowledge, in a single pass over the
+            # sentences that hold any of the newly known cells
+            self._mines |= unmarked_mines
+            self._safes |= unmarked_safes
+            for mine in iter_cells(unmarked_mines):
+                self._discard_available(mine)
+                print("*** *** mark mine:", self._dec(mine))
+            for sentence in changed:
+                sentence.mark_mines_batch(unmarked_mines)
+                sentence.mark_safes_batch(unmarked_safes)
+            self._reindex()
+
+            return changed
+
+        # Semi-naive evaluation: each iteration only pairs the sentences
+        # added or changed in the previous one (`delta`) against the
+        # knowledge base, since all other pairs were already tested.
+        # The first delta holds the sentences changed by mark_mine /
+        # mark_safe since the last call, those changed by step 2 and the
+        # sentence added by step 3.
+        delta = self._pending + marked_safe
+        self._pending = []
+        if is_new_sentence_added:
+            delta.append(new_sentence)
 
         # Keep looping until knowledge is updated completely.
         count = 0
@@ -271,90 +598,52 @@ class MinesweeperAI():
             count += 1
             # 4 • If, based on any of the sentences in self.knowledge, new cells can be marked as safe or as mines, then the function should do so.
 
-            is_changes_made1 = update_knowledge(self.knowledge)
+            delta = list({
+                id(sentence): sentence
+                for sentence in delta + update_knowledge()
+                if sentence in self.knowledge
+            }.values())
+
+            # no new or changed sentences means loop can stop
+            if not delta:
+                break
+
+            # sentences of a single cell are resolved by the next update,
+            # so pairing them would infer nothing that marking does not
+            pairable = [sentence for sentence in delta if sentence.size > 1]
 
         # 5 • If, based on any of the sentences in self.knowledge, new sentences can be inferred (using the subset method described in the Background), then those sentences should be added to the knowledge base as well.
 
-            # detect overlapping sentences, for each relevant coordinate
-            overlaps_per_coord = dict()
-            for coord in self.compute_knowledge_coords():
-                # print(coord)
-                overlaps = []
-                uniques = set()
-                for sentence in self.knowledge:
-                    cells = frozenset(sentence.cells)
-                    count = sentence.count
-                    if coord in cells:
-                        if (cells, count) not in uniques:
-                            overlaps.append(sentence)
-                            uniques.add((cells, count))
-                        else:
-                            # remove duplicate sentence
-                            self.knowledge.remove(sentence)
-                if len(overlaps) >= 2:
-                    overlaps_per_coord[coord] = overlaps
-            # # debug print
-            # for k,v in overlaps_per_coord.items():
-            #     print(k,v)
-
-            # employing subset method with each sentence pair permutation
-            permutations_per_coord = dict()
-            for coord, overlaps in overlaps_per_coord.items():
-                permutations_per_coord[coord] = itertools.permutations(
-                    overlaps, 2)
-            # # debug print
-            # for k,v in permutations_per_coord.items():
-            #     print(k,v)
-
-            # stored as hashable tuples instead of Sentence(), to eliminate duplicates
             new_sentences = set()
-
-            for coord, permutations in permutations_per_coord.items():
-                print("subset technique for:", coord, end=" ")
-                for j, (left, right) in enumerate(permutations):
-                    if left.cells < right.cells:
-                        print(f"\n{j}", end=" ")
-                        new_sentence_tuple = (  # needs to be hashable
-                            frozenset(right.cells - left.cells),
-                            right.count - left.count
-                        )
-                        print(new_sentence_tuple, end=" ")
-                        new_sentences.add(new_sentence_tuple)
-                    else:
-                        print(j, end=" ")
-                print("\n")
-                # left.cells == right.cells can be ignored because the result will be empty set with 0 count
-
-            new_sentences = list(map(
-                lambda tuple: Sentence(tuple[0], tuple[1]),
-                new_sentences
-            ))
-
-            if len(new_sentences) > 0:
+            if pairable:
+                others = self._others(pairable)
+                pairs = len(pairable) * len(others)
+                if (self._use_kernel and pairs > KERNEL_MIN_PAIRS
+                        and load_kernel() is not None):
+                    new_sentences = self._infer_subsets_kernel(pairable, others)
+                else:
+                    new_sentences = self._infer_subsets(pairable, others)
+
+            # skip duplicates of sentences that are already known
+            delta = []
+            append = delta.append
+            add_sentence = self._add_sentence
+            for cells_mask, mines_count in new_sentences:
+                sentence = Sentence.from_mask(cells_mask, mines_count)
+                if add_sentence(sentence):
+                    append(sentence)
+
+            if delta:
                 print("__add subset technique new sentences__")
-            for ns in new_sentences:
+            for ns in delta:
                 print(ns)
-
-            self.knowledge += new_sentences
-            # only new sentences need to be updated here
-            if len(new_sentences) > 0:
-                print("update knowledge (new sentences)")
-                is_changes_made_2 = update_knowledge(new_sentences)
-            else:
-                is_changes_made_2 = False
-
-            is_changes_made = is_changes_made1 or is_changes_made_2
-
-            # no changes made means loop can stop
-            if is_changes_made is False:
-                break
         print("___knowledge___")
         for sentence in self.knowledge:
             print(sentence)
         print("___mines___")
         print(self.mines)
         print("___safe moves___")
-        print(self.safes - self.moves_made)
+        print(self._dec_mask(self._safes & ~self._moves_made))
 
     def make_safe_move(self):
         """
@@ -365,21 +654,15 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        possible_set = (self.safes - self.moves_made)
-        move = next(iter(possible_set)) if len(possible_set) > 0 else None
+        possible_set = self._safes & ~self._moves_made
+        # lowest set bit, without going through iter_cells
+        move = self._dec((possible_set & -possible_set).bit_length() - 1) if possible_set else None
 
         if move is not None:
             print()
             print("-->", move)
         return move
 
-    def compute_possible_set(self):
-        return (
-            set(itertools.product(range(self.height), range(self.width)))
-            - self.moves_made
-            - self.mines
-        )
-
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
@@ -387,12 +670,11 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        possible_set = self.compute_possible_set()
-
-        if len(possible_set) == 0:
+        available = self._available_list
+        if not available:
             return None
 
-        move = random.sample(possible_set, 1)[0]
+        move = self._dec(available[random.randrange(len(available))])
 
         for _ in range(5):
             print("*")
@@ -0,0 +1,176 @@
+import contextlib
+import io
+import random
+
+import minesweeper
+from minesweeper import Minesweeper, MinesweeperAI, Sentence
+
+
+def test(name, result, expected):
+    print(f"___{name}")
+    print(result)
+    print("* pass" if result == expected else "! fail")
+    print()
+
+
+def quiet(function, *args):
+    # the AI prints its reasoning on every move
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+# Sentence, on cell ids / masks
+
+sentence = Sentence([0, 1, 2], 3)
+test("known_mines (all mines)", sentence.known_mines(), 0b111)
+test("known_safes (all mines)", sentence.known_safes(), 0)
+
+sentence = Sentence([0, 1], 0)
+test("known_safes (no mines)", sentence.known_safes(), 0b11)
+test("known_mines (no mines)", sentence.known_mines(), 0)
+
+sentence = Sentence([0, 1, 2], 2)
+test("known_mines (undetermined)", sentence.known_mines(), 0)
+test("known_safes (undetermined)", sentence.known_safes(), 0)
+
+sentence.mark_mine(1)
+test("mark_mine", (sentence.cells, sentence.count), ({0, 2}, 1))
+sentence.mark_mine(5)
+test("mark_mine (cell not in sentence)", (sentence.cells, sentence.count), ({0, 2}, 1))
+sentence.mark_safe(0)
+test("mark_safe", (sentence.cells, sentence.count), ({2}, 1))
+test("known_mines (after marking)", sentence.known_mines(), 0b100)
+
+sentence = Sentence([0, 1, 2, 3], 2)
+sentence.mark_mines_batch(0b0011)
+sentence.mark_safes_batch(0b0100)
+test("mark_*_batch", (sentence.cells, sentence.count, sentence.size), ({3}, 0, 1))
+
+test("__eq__ / __hash__", len({Sentence([1, 2], 1), Sentence.from_mask(0b110, 1)}), 1)
+
+
+# Minesweeper.nearby_mines
+
+game = Minesweeper(height=8, width=8, mines=0)
+for i, j in [(0, 1), (1, 0), (1, 1), (0, 3), (0, 5), (1, 4), (6, 6), (7, 0)]:
+    game.board[i, j] = 1
+test("nearby_mines (top left corner)", game.nearby_mines((0, 0)), 3)
+test("nearby_mines (bottom right corner)", game.nearby_mines((7, 7)), 1)
+test("nearby_mines (bottom left corner, is a mine)", game.nearby_mines((7, 0)), 0)
+test("nearby_mines (top edge)", game.nearby_mines((0, 4)), 3)
+test("nearby_mines (left edge)", game.nearby_mines((2, 0)), 2)
+test("nearby_mines (no neighbours)", game.nearby_mines((4, 3)), 0)
+
+
+# MinesweeperAI.add_knowledge, on a 2x3 board with a single mine at (1, 1):
+#   . . .
+#   . X .
+
+ai = MinesweeperAI(height=2, width=3)
+quiet(ai.add_knowledge, (0, 0), 1)
+quiet(ai.add_knowledge, (0, 1), 1)
+# {(1, 0), (1, 1)} = 1 is a subset of {(0, 2), (1, 0), (1, 1), (1, 2)} = 1
+test("add_knowledge (subset inference)", ai.safes, {(0, 0), (0, 1), (0, 2), (1, 2)})
+test("make_safe_move", quiet(ai.make_safe_move) in {(0, 2), (1, 2)}, True)
+quiet(ai.add_knowledge, (0, 2), 1)
+test("add_knowledge (mine found)", ai.mines, {(1, 1)})
+test("add_knowledge (remaining safe)", (1, 0) in ai.safes, True)
+
+
+# MinesweeperAI.mark_safe between moves, on a 3x5 board: the sentences
+# it shrinks must still be paired by the next add_knowledge
+
+ai = MinesweeperAI(height=3, width=5)
+quiet(ai.add_knowledge, (0, 0), 1)
+quiet(ai.add_knowledge, (2, 0), 1)
+quiet(ai.mark_safe, (0, 1))
+quiet(ai.add_knowledge, (0, 4), 0)
+# {(1, 0), (1, 1)} = 1 is a subset of {(1, 0), (1, 1), (2, 1)} = 1
+test("mark_safe then add_knowledge (subset inference)", (2, 1) in ai.safes, True)
+
+
+# MinesweeperAI against a brute-force closure of all revealed counts
+
+def closure(game, revealed):
+    """
+    Applies marking and the subset method to the sentences of all
+    revealed cells until nothing changes, on plain sets of (i, j) cells.
+    """
+    safes = set(revealed)
+    mines = set()
+    knowledge = set()
+    for (i, j), count in revealed.items():
+        cells = frozenset(
+            (x, y)
+            for x in range(i - 1, i + 2)
+            for y in range(j - 1, j + 2)
+            if (x, y) != (i, j) and 0 <= x < game.height and 0 <= y < game.width
+        )
+        knowledge.add((cells, count))
+    while True:
+        knowledge = {
+            (cells - mines - safes, count - len(cells & mines))
+            for cells, count in knowledge
+        }
+        knowledge = {(cells, count) for cells, count in knowledge if cells}
+        known = set()
+        for cells, count in knowledge:
+            if count == 0:
+                safes |= cells
+                known |= cells
+            elif count == len(cells):
+                mines |= cells
+                known |= cells
+        inferred = {
+            (right - left, right_count - left_count)
+            for left, left_count in knowledge
+            for right, right_count in knowledge
+            if left < right
+        } - knowledge
+        if not known and not inferred:
+            return mines, safes
+        knowledge |= inferred
+
+
+def compare(height, width, mines, seeds):
+    failures = 0
+    for seed in range(seeds):
+        random.seed(seed)
+        game = Minesweeper(height=height, width=width, mines=mines)
+        ai = MinesweeperAI(height=height, width=width)
+        revealed = {}
+        while True:
+            move = quiet(ai.make_safe_move) or quiet(ai.make_random_move)
+            if move is None or game.is_mine(move):
+                break
+            revealed[move] = game.nearby_mines(move)
+            quiet(ai.add_knowledge, move, revealed[move])
+            if (ai.mines, ai.safes) != closure(game, revealed):
+                failures += 1
+                break
+    return failures
+
+
+test("add_knowledge vs closure (4x4, 3 mines)", compare(4, 4, 3, 40), 0)
+test("add_knowledge vs closure (5x5, 6 mines)", compare(5, 5, 6, 40), 0)
+test("add_knowledge vs closure (8x8, 10 mines)", compare(8, 8, 10, 20), 0)
+test("add_knowledge vs closure (9x9, 10 mines)", compare(9, 9, 10, 10), 0)
+
+
+# Compiled subset kernel (needs numba), forced on every subset step
+
+if minesweeper.load_kernel() is None:
+    print("___subset kernel")
+    print("numba is not installed, skipped")
+    print()
+else:
+    ai = MinesweeperAI(height=8, width=8)
+    delta = [Sentence([0, 1], 1), Sentence([0, 1, 2, 3], 2)]
+    others = [Sentence([0, 1, 2], 1), Sentence([1, 2], 1), Sentence([4, 5], 1)]
+    test("infer_subsets kernel vs Python",
+         ai._infer_subsets_kernel(delta, others), ai._infer_subsets(delta, others))
+
+    kernel_min_pairs = minesweeper.KERNEL_MIN_PAIRS
+    minesweeper.KERNEL_MIN_PAIRS = 0
+    test("add_knowledge vs closure (8x8, 10 mines, kernel)", compare(8, 8, 10, 20), 0)
+    minesweeper.KERNEL_MIN_PAIRS = kernel_min_pairs